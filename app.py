@@ -1,19 +1,25 @@
 import os
 import io
+import shutil
+import sqlite3
 import zipfile
 from pathlib import Path
 
 import streamlit as st
 from dotenv import load_dotenv
-import fitz  # PyMuPDF for PDF reading
 
-from langchain_groq import ChatGroq
 from langchain_huggingface.embeddings.huggingface_endpoint import HuggingFaceEndpointEmbeddings
 from langchain_community.vectorstores import Chroma
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 
-from utils.config import OUTPUT_DIR
+from utils.config import (
+    OUTPUT_DIR, UPLOAD_BLOCK_SIZE, INGEST_MEMORY_MB, INGEST_BATCH_CHUNKS,
+    CHUNK_STRATEGY, EMBEDDING_MODEL, EMBEDDING_DIM, VECTOR_INDEX_NAME
+)
+from utils.doc_store import get_doc_store, chunk_filter
+from utils.text_splitter import batch_chunks
 from chains.booklet_chain import generate_booklet_from_pdf
+from chains.batch_rag_chain import run_batch_rag_query
+from utils.llm_router import get_router
 
 # =========================
 # Page Config
@@ -35,48 +41,78 @@ if not HF_API_KEY:
 # =========================
 # Helper Functions
 # =========================
-def extract_text_from_pdf(file_path):
-    """Extract all text from a PDF file path."""
-    doc = fitz.open(file_path)
-    full_text = ""
-    for page in doc:
-        full_text += page.get_text()
-    return full_text
-
-def split_text(text, chunk_size=1000, chunk_overlap=200):
-    """Splits text into manageable chunks."""
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap
+def save_upload(uploaded_file, dest_path, block_size=UPLOAD_BLOCK_SIZE):
+    """Copy an uploaded file to disk in fixed-size blocks instead of one read()."""
+    uploaded_file.seek(0)
+    with open(dest_path, "wb") as f:
+        shutil.copyfileobj(uploaded_file, f, length=block_size)
+    return dest_path
+
+# add_texts holds every embedding of a batch as a list of Python floats
+# (~32 bytes per dimension), far more than the chunk text itself.
+VECTOR_BYTES = EMBEDDING_DIM * 32
+
+def iter_doc_chunk_batches(doc_id, strategy=CHUNK_STRATEGY, max_memory_mb=INGEST_MEMORY_MB):
+    """Stream a stored document's chunks in batches whose text and embeddings fit in max_memory_mb,
+    with at most INGEST_BATCH_CHUNKS chunks per embeddings request."""
+    chunks = get_doc_store().iter_chunks(doc_id, strategy=strategy)
+    return batch_chunks(
+        chunks,
+        max_bytes=int(max_memory_mb * 1024 * 1024),
+        key=lambda c: c["text"],
+        max_items=INGEST_BATCH_CHUNKS,
+        item_overhead=VECTOR_BYTES
     )
-    return splitter.split_text(text)
 
-def build_vectorstore(texts, persist_directory="vectorstore", index_name="rag_index"):
-    """Builds Chroma vectorstore using HuggingFace Inference API embeddings."""
+def index_pdf(file_path, strategy=CHUNK_STRATEGY):
+    """Ingest a PDF into the document store (parsed only the first time the store sees it)
+    and index its chunks; returns a retriever limited to this document and strategy."""
+    store = get_doc_store()
+    doc_id = store.ingest_pdf(str(file_path))
+    doc_sha = store.get_document(doc_id)["sha256"]
+    return build_vectorstore(
+        iter_doc_chunk_batches(doc_id, strategy=strategy),
+        search_filter=chunk_filter(doc_sha, strategy)
+    )
+
+def build_vectorstore(batches, search_filter=None, persist_directory="vectorstore", index_name=VECTOR_INDEX_NAME):
+    """Builds Chroma vectorstore batch by batch using HuggingFace Inference API embeddings.
+    Each batch is a list of chunk records from utils.doc_store; search_filter scopes the retriever."""
+    # Same model whose tokenizer sized the chunks (see utils.text_splitter)
     embedder = HuggingFaceEndpointEmbeddings(
+        model=EMBEDDING_MODEL,
         huggingfacehub_api_token=HF_API_KEY
     )
-    vectordb = Chroma.from_texts(
-        texts,
-        embedding=embedder,
-        persist_directory=persist_directory,
-        collection_name=index_name
+    vectordb = Chroma(
+        collection_name=index_name,
+        embedding_function=embedder,
+        persist_directory=persist_directory
     )
-    
-    return vectordb.as_retriever(search_type="similarity", search_kwargs={"k": 4})
+    for batch in batches:
+        # Each batch is embedded and persisted before the next one is read,
+        # so chunk text and vectors never accumulate for the whole document.
+        # Chunk ids make re-indexing the same document an upsert rather than a duplicate.
+        vectordb.add_texts(
+            [c["text"] for c in batch],
+            metadatas=[
+                {"doc_sha": c["doc_sha"], "strategy": c["strategy"], "chunk": c["idx"], "start": c["start"], "end": c["end"]}
+                for c in batch
+            ],
+            ids=[c["id"] for c in batch]
+        )
+
+    search_kwargs = {"k": 4}
+    if search_filter:
+        search_kwargs["filter"] = search_filter
+    return vectordb.as_retriever(search_type="similarity", search_kwargs=search_kwargs)
 
 def run_rag_query(query, retriever):
-    """Runs a RAG query using Groq LLM + Chroma retriever."""
+    """Runs a RAG query using the LLM router + Chroma retriever."""
     docs = retriever.get_relevant_documents(query)
     context = "\n\n".join([doc.page_content for doc in docs])
 
-    llm = ChatGroq(
-        groq_api_key=GROQ_API_KEY,
-        model_name="llama3-70b-8192"
-    )
     prompt = f"Answer the following question based on the provided context.\n\nContext:\n{context}\n\nQuestion: {query}"
-    response = llm.invoke(prompt)
-    return response.content
+    return get_router().invoke(prompt, task="answer")
 
 # =========================
 # Streamlit UI
@@ -84,6 +120,13 @@ def run_rag_query(query, retriever):
 st.title("📄 Autonomous RAG App")
 st.write("Upload a PDF, index it with free HuggingFace embeddings, chat with it using Groq LLM, and generate a LaTeX booklet.")
 
+chunk_strategy = st.sidebar.selectbox(
+    "Chunking strategy",
+    ["tokens", "recursive"],
+    index=0 if CHUNK_STRATEGY == "tokens" else 1,
+    help="'tokens' keeps every chunk within the embedding model's max sequence length."
+)
+
 # Upload PDF
 uploaded_file = st.file_uploader("Upload your PDF", type=["pdf"])
 if uploaded_file:
@@ -91,18 +134,23 @@ if uploaded_file:
     uploads_dir = Path("data/uploads")
     uploads_dir.mkdir(parents=True, exist_ok=True)
     saved_pdf_path = uploads_dir / uploaded_file.name
-    with open(saved_pdf_path, "wb") as f:
-        f.write(uploaded_file.read())
-
-    with st.spinner("📄 Extracting text from PDF..."):
-        pdf_text = extract_text_from_pdf(saved_pdf_path)
 
-    with st.spinner("✂️ Splitting text..."):
-        chunks = split_text(pdf_text)
-
-    with st.spinner("📦 Building vectorstore (this may take a few seconds)..."):
-        retriever = build_vectorstore(chunks)
+    # Streamlit reruns the script on every interaction; only ingest a file once.
+    upload_key = (uploaded_file.name, uploaded_file.size, chunk_strategy)
+    if st.session_state.get("upload_key") != upload_key:
+        save_upload(uploaded_file, saved_pdf_path)
 
+        with st.spinner("📦 Extracting, splitting and indexing PDF (this may take a few seconds)..."):
+            try:
+                st.session_state["retriever"] = index_pdf(saved_pdf_path, strategy=chunk_strategy)
+            except sqlite3.OperationalError as e:
+                # e.g. "database is locked" while other sessions ingest large PDFs;
+                # upload_key is not updated, so the next interaction retries.
+                st.error(f"❌ Document store is busy ({e}). Please try again in a moment.")
+                st.stop()
+        st.session_state["upload_key"] = upload_key
+
+    retriever = st.session_state["retriever"]
     st.success("✅ PDF processed and indexed!")
 
     # =========================
@@ -113,7 +161,8 @@ if uploaded_file:
             try:
                 tex_path, image_paths = generate_booklet_from_pdf(
                     str(saved_pdf_path),
-                    out_dir=str(OUTPUT_DIR)
+                    out_dir=str(OUTPUT_DIR),
+                    chunk_strategy=chunk_strategy
                 )
                 st.success("Booklet generated (LaTeX).")
 
@@ -149,3 +198,13 @@ if uploaded_file:
             answer = run_rag_query(query, retriever)
         st.markdown("### Answer:")
         st.write(answer)
+
+    # =========================
+    # Question Checklist
+    # =========================
+    with st.expander("Run a question checklist"):
+        checklist = st.text_area("One question per line:")
+        if st.button("Answer all questions") and checklist.strip():
+            with st.spinner("🤖 Answering checklist..."):
+                rows = run_batch_rag_query(checklist.splitlines(), retriever)
+            st.table(rows)
@@ -0,0 +1,196 @@
+"""
+chains/batch_rag_chain.py
+
+Answer a checklist of questions against an indexed PDF in one batch:
+1. Embed all questions with a single embedding call
+2. Retrieve context for every question with one batched Chroma query
+3. Keep each retrieved chunk once and report which questions share context
+4. Dispatch the LLM calls concurrently through the LLM router
+
+Can also be run from the command line against the persisted vectorstore,
+printing the answers table as CSV:
+    python -m chains.batch_rag_chain questions.txt --pdf paper.pdf > answers.csv
+"""
+
+from typing import Dict, List, Optional
+
+from utils.config import EMBEDDING_MODEL, HF_API_KEY, VECTOR_INDEX_NAME
+from utils.llm_router import get_router
+
+PROMPT_TEMPLATE = "Answer the following question based on the provided context.\n\nContext:\n{context}\n\nQuestion: {question}"
+
+
+def _query_collection(vectordb, query_vectors: List[List[float]], k: int, where: Optional[Dict] = None) -> Dict:
+    """
+    Query Chroma with several embeddings at once.
+    LangChain's Chroma wrapper only searches one vector per call, so this goes through
+    its underlying chromadb collection; keep that private access confined to here.
+    """
+    return vectordb._collection.query(
+        query_embeddings=query_vectors,
+        n_results=k,
+        where=where,
+        include=["documents"]
+    )
+
+
+def retrieve_batch(questions: List[str], vectordb, k: int = 4, where: Optional[Dict] = None) -> Dict:
+    """
+    Retrieve the top-k chunks for every question in one similarity pass.
+
+    Args:
+        questions: List of question strings.
+        vectordb: LangChain Chroma vectorstore.
+        k: Number of chunks per question.
+        where: Optional Chroma metadata filter (see utils.doc_store.chunk_filter).
+
+    Returns:
+        {"chunks": {chunk_id: text}, "question_chunks": [[chunk_id, ...], ...]}
+        where a chunk retrieved for several questions is stored only once.
+    """
+    query_vectors = vectordb.embeddings.embed_documents(questions)
+    result = _query_collection(vectordb, query_vectors, k, where=where)
+
+    chunks: Dict[str, str] = {}
+    for ids, docs in zip(result["ids"], result["documents"]):
+        chunks.update(zip(ids, docs))
+
+    return {"chunks": chunks, "question_chunks": result["ids"]}
+
+
+def _shared_context(question_chunks: List[List[str]]) -> List[List[int]]:
+    """
+    For each question, the (1-based) numbers of the other questions that retrieved any of its chunks.
+    """
+    askers: Dict[str, List[int]] = {}
+    for i, chunk_ids in enumerate(question_chunks, start=1):
+        for chunk_id in chunk_ids:
+            askers.setdefault(chunk_id, []).append(i)
+
+    return [
+        sorted({j for chunk_id in chunk_ids for j in askers[chunk_id]} - {i})
+        for i, chunk_ids in enumerate(question_chunks, start=1)
+    ]
+
+
+def run_batch_rag_query(
+    questions: List[str],
+    retriever,
+    router=None,
+    max_concurrency: int = 8
+) -> List[Dict]:
+    """
+    Answer a list of questions using the LLM router + a Chroma retriever.
+
+    Args:
+        questions: List of question strings (blank entries are ignored).
+        retriever: LangChain VectorStoreRetriever backed by Chroma.
+        router: Optional LLMRouter; defaults to the shared router.
+        max_concurrency: Maximum number of LLM calls in flight.
+
+    Returns:
+        List of {"question", "answer", "sources", "shared_with"} dicts, in input order.
+        "sources" lists the retrieved chunk ids and "shared_with" the numbers of
+        other questions whose answers drew on some of the same chunks.
+    """
+    questions = [q.strip() for q in questions if q.strip()]
+    if not questions:
+        return []
+
+    if router is None:
+        router = get_router()
+
+    # Same scope as single questions: the retriever's k and document/strategy filter
+    k = retriever.search_kwargs.get("k", 4)
+    where = retriever.search_kwargs.get("filter")
+    retrieved = retrieve_batch(questions, retriever.vectorstore, k=k, where=where)
+    chunks = retrieved["chunks"]
+
+    prompts = [
+        PROMPT_TEMPLATE.format(
+            context="\n\n".join(chunks[chunk_id] for chunk_id in chunk_ids),
+            question=question
+        )
+        for question, chunk_ids in zip(questions, retrieved["question_chunks"])
+    ]
+    responses = router.batch(
+        prompts,
+        task="answer",
+        max_concurrency=max_concurrency,
+        return_exceptions=True
+    )
+
+    shared = _shared_context(retrieved["question_chunks"])
+
+    results = []
+    for question, chunk_ids, response, others in zip(questions, retrieved["question_chunks"], responses, shared):
+        answer = f"Error: {response}" if isinstance(response, Exception) else response
+        results.append({
+            "question": question,
+            "answer": answer,
+            "sources": ", ".join(chunk_ids),
+            "shared_with": ", ".join(f"Q{j}" for j in others)
+        })
+    return results
+
+
+def load_retriever(
+    persist_directory: str = "vectorstore",
+    index_name: str = VECTOR_INDEX_NAME,
+    k: int = 4,
+    search_filter: Optional[Dict] = None
+):
+    """
+    Open the persisted Chroma index written by app.py, optionally scoped by a metadata filter.
+    """
+    from langchain_community.vectorstores import Chroma
+    from langchain_huggingface.embeddings.huggingface_endpoint import HuggingFaceEndpointEmbeddings
+
+    # Same model whose tokenizer sized the chunks (see utils.text_splitter)
+    embedder = HuggingFaceEndpointEmbeddings(
+        model=EMBEDDING_MODEL,
+        huggingfacehub_api_token=HF_API_KEY
+    )
+    vectordb = Chroma(
+        collection_name=index_name,
+        embedding_function=embedder,
+        persist_directory=persist_directory
+    )
+    search_kwargs = {"k": k}
+    if search_filter:
+        search_kwargs["filter"] = search_filter
+    return vectordb.as_retriever(search_type="similarity", search_kwargs=search_kwargs)
+
+
+if __name__ == "__main__":
+    import argparse
+    import csv
+    import sys
+
+    parser = argparse.ArgumentParser(description="Answer a checklist of questions against the indexed PDF.")
+    parser.add_argument("questions", help="Text file with one question per line")
+    parser.add_argument("--persist-directory", default="vectorstore")
+    parser.add_argument("--index-name", default=VECTOR_INDEX_NAME)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--pdf", help="Only retrieve from this (already indexed) PDF")
+    parser.add_argument("--strategy", default=None, help="Chunking strategy the PDF was indexed with")
+    args = parser.parse_args()
+
+    search_filter = None
+    if args.pdf:
+        from utils.config import CHUNK_STRATEGY
+        from utils.doc_store import chunk_filter, file_sha256
+        search_filter = chunk_filter(file_sha256(args.pdf), args.strategy or CHUNK_STRATEGY)
+
+    with open(args.questions, encoding="utf-8") as f:
+        question_list = f.read().splitlines()
+
+    rows = run_batch_rag_query(
+        question_list,
+        load_retriever(args.persist_directory, args.index_name, search_filter=search_filter),
+        max_concurrency=args.max_concurrency
+    )
+    # Same columns as the table in the app; answers with newlines are quoted.
+    writer = csv.DictWriter(sys.stdout, fieldnames=["question", "answer", "sources", "shared_with"])
+    writer.writeheader()
+    writer.writerows(rows)
@@ -15,12 +15,9 @@ from typing import Optional, List, Dict
 
 from utils.pdf_loader import extract_text, split_into_sections
 from utils.semantic_scholar import search_paper_by_title, format_citation
-from utils.visualization import flow_diagram, bar_chart
 from utils.latex_generator import generate_booklet_pdf
 from utils.config import GROQ_API_KEY
 
-from langchain_groq import ChatGroq
-
 
 def _summarize_section(text: str, llm) -> str:
     """
@@ -47,48 +44,43 @@ def _enrich_with_citation(section_heading: str) -> Optional[str]:
     return None
 
 
-def _generate_visual(section_text: str) -> Optional[str]:
-    """
-    Generate a diagram or chart based on section content (rule-based).
-    """
-    lines = section_text.split("\n")
-    # Simple detection for methodology steps
-    steps = [line.strip("-•0123456789. ") for line in lines if line.strip().startswith(("-", "•", "1", "2", "3"))]
-    if len(steps) >= 3:
-        return flow_diagram(steps)
-
-    # Simple detection for numeric results
-    numeric_lines = [(l.split(":")[0], l.split(":")[1]) for l in lines if ":" in l and any(c.isdigit() for c in l)]
-    if 1 <= len(numeric_lines) <= 6:
-        labels, vals = [], []
-        for label, val in numeric_lines:
-            try:
-                labels.append(label.strip())
-                vals.append(float(val.strip().replace("%", "")))
-            except ValueError:
-                continue
-        if labels and vals:
-            return bar_chart(labels, vals, title="Results")
-    return None
-
 from pathlib import Path
 from typing import List, Dict, Optional
-from langchain_groq import ChatGroq
 import os
+import sqlite3
 
 from utils.latex_generator import generate_booklet_pdf
 from utils.pdf_loader import extract_text, split_into_sections
-from utils.visualization import _generate_visual
+from utils.visualization import render_section_visual
+from utils.section_analysis import analyze_sections
 from utils.semantic_scholar import _enrich_with_citation
+from utils.text_splitter import split_text
+from utils.llm_router import get_router
+from utils.doc_store import get_doc_store
+from utils.config import CHUNK_STRATEGY, GROQ_MODEL, SUMMARY_CHUNK_TOKENS
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
+def _split_for_summary(text: str, strategy: str) -> List[str]:
+    """
+    Split an overlong section into pieces that fit the LLM context.
+    Most sections come back as a single piece.
+    """
+    if strategy == "tokens":
+        return split_text(text, strategy="tokens", chunk_size=SUMMARY_CHUNK_TOKENS, chunk_overlap=0, model_name=GROQ_MODEL)
+    # Roughly four characters per token
+    return split_text(text, strategy="recursive", chunk_size=SUMMARY_CHUNK_TOKENS * 4, chunk_overlap=0)
+
+
 def generate_booklet_from_pdf(
     pdf_path: str,
-    out_dir: Optional[str] = None
+    out_dir: Optional[str] = None,
+    chunk_strategy: str = CHUNK_STRATEGY
 ) -> tuple:
     """
     Full pipeline: PDF → booklet LaTeX + images.
+    chunk_strategy ("tokens" or "recursive") controls how overlong sections
+    are split before summarization.
 
     Returns:
         (tex_path, image_paths)
@@ -98,25 +90,32 @@ def generate_booklet_from_pdf(
     out_dir = Path(out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    # Initialize Groq LLM
-    llm = ChatGroq(
-        model_name="llama3-70b-8192",
-        groq_api_key=GROQ_API_KEY,
-        temperature=0
-    )
+    # Summaries go to the router's cheaper "summarize" backends
+    router = get_router()
 
-    # Step 1: Extract text & split into sections
-    raw_text = extract_text(pdf_path)
-    sections_raw = split_into_sections(raw_text)
+    # Step 1: Sections from the document store (the PDF is parsed only if the store hasn't seen it)
+    try:
+        store = get_doc_store()
+        sections_raw = store.get_sections(store.ingest_pdf(pdf_path))
+    except sqlite3.OperationalError:
+        # Store locked by other sessions for too long: parse the PDF directly instead
+        sections_raw = split_into_sections(extract_text(pdf_path))
+    # Term counts, steps and numeric results for every section in one pass
+    analyses = analyze_sections(sections_raw)
 
     sections_processed: List[Dict[str, str]] = []
     images: List[str] = []
 
-    for sec in sections_raw:
+    for sec, analysis in zip(sections_raw, analyses):
         # Step 2: Summarize
-        summary = llm.invoke(
-            f"Summarize the following section in clear, simple terms:\n\n{sec['text']}"
-        ).content
+        summary = "\n\n".join(
+            router.invoke(
+                f"Summarize the following section in clear, simple terms:\n\n{piece}",
+                task="summarize",
+                temperature=0
+            )
+            for piece in _split_for_summary(sec["text"], chunk_strategy)
+        )
 
         # Step 3: Add citation (optional)
         citation = _enrich_with_citation(sec["heading"])
@@ -124,7 +123,7 @@ def generate_booklet_from_pdf(
             summary += f"\n\nFurther reading: {citation}"
 
         # Step 4: Generate visual (optional)
-        img_path = _generate_visual(sec["text"], out_dir)
+        img_path = render_section_visual(analysis, out_dir)
         if img_path:
             images.append(str(img_path))
 
@@ -1,17 +1,48 @@
 """
 chains/chatbot_chain.py
 
-Conversational RAG chatbot with LangChain + Groq LLM.
+Conversational RAG chatbot with LangChain + the LLM router.
 """
 
+from typing import Any, List, Optional
+
 from langchain.chains import ConversationalRetrievalChain
-from langchain_groq import ChatGroq
-from utils.config import GROQ_API_KEY
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from utils.llm_router import get_router
+
+
+class RouterChatModel(BaseChatModel):
+    """
+    LangChain chat model that sends every call through the shared LLM router,
+    so LangChain chains get the same backends, limits and failover as the app.
+    """
+
+    task: str = "answer"
+    temperature: Optional[float] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "llm-router"
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        # Router backends take a single prompt string
+        prompt = "\n\n".join(str(m.content) for m in messages)
+        text = get_router().invoke(prompt, task=self.task, temperature=self.temperature)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
 
 
 def build_chatbot(retriever):
     """
-    Build a conversational retrieval chain using Groq LLM.
+    Build a conversational retrieval chain on top of the LLM router.
 
     Args:
         retriever: LangChain retriever object (e.g., from ChromaDB).
@@ -19,11 +50,7 @@ def build_chatbot(retriever):
     Returns:
         LangChain ConversationalRetrievalChain instance.
     """
-    llm = ChatGroq(
-        model="llama3-70b-8192",
-        api_key=GROQ_API_KEY,
-        temperature=0
-    )
+    llm = RouterChatModel(task="answer", temperature=0)
 
     qa_chain = ConversationalRetrievalChain.from_llm(
         llm=llm,
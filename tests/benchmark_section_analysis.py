@@ -0,0 +1,52 @@
+"""
+tests/benchmark_section_analysis.py
+
+Times utils.section_analysis.analyze_sections against the per-section loops the
+booklet used before it, on the papers in tests/ (or the PDFs given as arguments):
+    python -m tests.benchmark_section_analysis [paper.pdf ...]
+
+The old loops did no lowercasing, stopword filtering or document-wide ranking,
+so the new analysis does more work per word; this tracks what that costs.
+"""
+
+import sys
+import timeit
+from pathlib import Path
+from typing import Dict, List
+
+from utils.pdf_loader import extract_text, split_into_sections
+from utils.section_analysis import analyze_sections
+
+
+def legacy_analysis(sections: List[Dict[str, str]]) -> List[Dict]:
+    """
+    Per-section dict loops and double line splits, as the booklet used to do.
+    """
+    results = []
+    for sec in sections:
+        freq = {}
+        for w in sec["text"].split():
+            freq[w] = freq.get(w, 0) + 1
+        top = sorted(freq.items(), key=lambda x: x[1], reverse=True)[:5]
+
+        lines = sec["text"].split("\n")
+        steps = [line.strip("-•0123456789. ") for line in lines if line.strip().startswith(("-", "•", "1", "2", "3"))]
+        numeric_lines = [(l.split(":")[0], l.split(":")[1]) for l in lines if ":" in l and any(c.isdigit() for c in l)]
+        results.append({"top_terms": top, "steps": steps, "numeric": numeric_lines})
+    return results
+
+
+def benchmark(pdf_path: str):
+    sections = split_into_sections(extract_text(pdf_path))
+    n_words = sum(len(s["text"].split()) for s in sections)
+    legacy = min(timeit.repeat(lambda: legacy_analysis(sections), number=20, repeat=5)) / 20
+    current = min(timeit.repeat(lambda: analyze_sections(sections), number=20, repeat=5)) / 20
+    print(f"{Path(pdf_path).name}: {len(sections)} sections, {n_words} words")
+    print(f"  per-section loops: {legacy * 1000:.1f} ms")
+    print(f"  section_analysis:  {current * 1000:.1f} ms ({current / legacy:.2f}x the old time)")
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or sorted(str(p) for p in Path(__file__).parent.glob("*.pdf"))
+    for path in paths:
+        benchmark(path)
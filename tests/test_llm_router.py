@@ -0,0 +1,113 @@
+"""
+tests/test_llm_router.py
+
+LLMRouter against a local stand-in for an OpenAI-compatible server:
+failover on 503, no failover on 400, per-backend concurrency and rate limits.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from utils.llm_router import Backend, LLMRouter
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """
+    /down/... answers 503, /bad/... answers 400, /slow/... echoes after 0.2 s,
+    anything else echoes the prompt straight away.
+    """
+    stats = {"active": 0, "max_active": 0, "starts": []}
+    lock = threading.Lock()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path.startswith("/down/"):
+            self.send_response(503)
+            self.end_headers()
+            return
+        if self.path.startswith("/bad/"):
+            self.send_response(400)
+            self.end_headers()
+            return
+
+        with self.lock:
+            self.stats["active"] += 1
+            self.stats["max_active"] = max(self.stats["max_active"], self.stats["active"])
+            self.stats["starts"].append(time.monotonic())
+        time.sleep(0.2 if self.path.startswith("/slow/") else 0)
+        with self.lock:
+            self.stats["active"] -= 1
+
+        reply = {"choices": [{"message": {"content": f"echo: {body['messages'][0]['content']}"}}]}
+        data = json.dumps(reply).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+@pytest.fixture
+def stats():
+    StandIn.stats.update(active=0, max_active=0, starts=[])
+    return StandIn.stats
+
+
+PROMPTS = [f"question {i}" for i in range(6)]
+
+
+def test_fails_over_on_503(url):
+    router = LLMRouter([
+        Backend("down", "openai", "stand-in", tasks=["answer"], base_url=f"{url}/down/v1"),
+        Backend("up", "openai", "stand-in", tasks=["summarize"], base_url=f"{url}/up/v1"),
+    ])
+    assert router.batch(PROMPTS, task="answer") == [f"echo: {p}" for p in PROMPTS]
+    assert not router.backends[0].available
+
+
+def test_does_not_fail_over_on_400(url):
+    router = LLMRouter([
+        Backend("bad", "openai", "stand-in", base_url=f"{url}/bad/v1"),
+        Backend("up", "openai", "stand-in", base_url=f"{url}/up/v1"),
+    ])
+    with pytest.raises(requests.HTTPError):
+        router.invoke("too long")
+    assert router.backends[0].available
+
+
+def test_all_backends_down(url):
+    router = LLMRouter([Backend("down", "openai", "stand-in", base_url=f"{url}/down/v1")])
+    with pytest.raises(RuntimeError, match="All LLM backends failed"):
+        router.invoke("hello")
+
+
+def test_caps_requests_in_flight(url, stats):
+    router = LLMRouter([Backend("slow", "openai", "stand-in", base_url=f"{url}/slow/v1", max_concurrency=2)])
+    router.batch(PROMPTS, max_concurrency=8)
+    assert stats["max_active"] == 2
+
+
+def test_spaces_requests_by_rate_limit(url, stats):
+    # 600 requests/minute means request starts at least 0.1 s apart
+    router = LLMRouter([Backend("paced", "openai", "stand-in", base_url=f"{url}/up/v1", requests_per_minute=600)])
+    router.batch(PROMPTS, max_concurrency=8)
+    starts = sorted(stats["starts"])
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    # Allow for scheduling jitter between the client-side wait and the server receiving the request
+    assert min(gaps) >= 0.075, gaps
@@ -1,5 +1,6 @@
 # utils/config.py
 import os
+import re
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -19,8 +20,44 @@ if not HF_API_KEY:
 # === Model Settings ===
 GROQ_MODEL = os.getenv("GROQ_MODEL", "llama3-70b-8192")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+# Vector size of EMBEDDING_MODEL (384 for all-MiniLM-L6-v2)
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "384"))
+# Chroma collection for EMBEDDING_MODEL's vectors; named after the model so switching
+# models (and vector sizes) starts a fresh collection instead of clashing with the old one.
+VECTOR_INDEX_NAME = os.getenv(
+    "VECTOR_INDEX_NAME",
+    "rag_" + re.sub(r"[^A-Za-z0-9._-]", "_", EMBEDDING_MODEL.split("/")[-1])[:59]
+)
+# Smaller, faster Groq model used for section summaries
+GROQ_SUMMARY_MODEL = os.getenv("GROQ_SUMMARY_MODEL", "llama3-8b-8192")
+# Optional OpenAI-compatible local server (llama.cpp, Ollama, ...), e.g. http://localhost:11434/v1
+LOCAL_LLM_URL = os.getenv("LOCAL_LLM_URL", "")
+LOCAL_LLM_MODEL = os.getenv("LOCAL_LLM_MODEL", "llama3")
+# Full backend list as JSON, overriding the defaults built from the settings above
+# (see utils/llm_router.default_backends for the format).
+LLM_BACKENDS = os.getenv("LLM_BACKENDS", "")
+
+# === Ingestion Limits ===
+# Uploads are copied to disk in blocks of this many bytes.
+UPLOAD_BLOCK_SIZE = int(os.getenv("UPLOAD_BLOCK_SIZE", str(1024 * 1024)))
+# Upper bound (MB) on chunk text plus embedding vectors held in memory before a batch is flushed to the vectorstore.
+INGEST_MEMORY_MB = float(os.getenv("INGEST_MEMORY_MB", "64"))
+# Most chunks sent to the embeddings API in one request, whatever the memory bound allows.
+INGEST_BATCH_CHUNKS = int(os.getenv("INGEST_BATCH_CHUNKS", "128"))
+
+# === Chunking ===
+# "tokens" splits on EMBEDDING_MODEL token boundaries, "recursive" on characters.
+CHUNK_STRATEGY = os.getenv("CHUNK_STRATEGY", "tokens")
+# all-MiniLM-L6-v2 truncates inputs at 256 word pieces, including [CLS] and [SEP];
+# a few pieces of slack on top of those two.
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "248"))
+CHUNK_TOKEN_OVERLAP = int(os.getenv("CHUNK_TOKEN_OVERLAP", "50"))
+# Longest section piece sent to GROQ_MODEL for summarization (leaves room for prompt + answer).
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "6000"))
 
 # Paths
 BASE_DIR = Path(__file__).resolve().parent.parent
 OUTPUT_DIR = BASE_DIR / "outputs"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+# SQLite database of parsed documents, pages, sections and chunks
+DOC_STORE_PATH = Path(os.getenv("DOC_STORE_PATH", str(BASE_DIR / "data" / "docstore.sqlite3")))
@@ -0,0 +1,332 @@
+"""
+utils/doc_store.py
+
+SQLite-backed store of parsed documents, so each PDF is parsed exactly once:
+- documents: one row per distinct file (keyed by SHA-256 of its bytes)
+- pages:     page text, with offsets into the pages joined by "\\n"
+- sections:  headings + bodies from pdf_loader.split_into_sections
+- chunks:    chunk text per chunking strategy, with hashes and offsets
+
+Both the RAG ingestion in app.py and the booklet chain read from here.
+"""
+
+import hashlib
+import sqlite3
+from contextlib import closing
+from functools import lru_cache
+from pathlib import Path
+import time
+from typing import Dict, Iterator, List, Optional
+
+from utils.config import CHUNK_STRATEGY, DOC_STORE_PATH, UPLOAD_BLOCK_SIZE
+from utils.pdf_loader import iter_pages, split_into_sections
+from utils.text_splitter import iter_chunk_spans
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    sha256 TEXT NOT NULL UNIQUE,
+    path TEXT NOT NULL,
+    n_pages INTEGER NOT NULL,
+    complete INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS pages (
+    doc_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    page_no INTEGER NOT NULL,
+    char_start INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (doc_id, page_no)
+);
+CREATE TABLE IF NOT EXISTS sections (
+    doc_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    heading TEXT NOT NULL,
+    char_start INTEGER NOT NULL,
+    char_end INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (doc_id, idx)
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    doc_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    strategy TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    char_start INTEGER NOT NULL,
+    char_end INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (doc_id, strategy, idx)
+);
+CREATE TABLE IF NOT EXISTS chunk_sets (
+    doc_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    strategy TEXT NOT NULL,
+    PRIMARY KEY (doc_id, strategy)
+);
+"""
+
+# Seconds a connection waits for another session's write lock before raising
+# sqlite3.OperationalError ("database is locked").
+BUSY_TIMEOUT = 30
+# Rows written per transaction, so the write lock is held only briefly.
+WRITE_BATCH_PAGES = 20
+WRITE_BATCH_CHUNKS = 500
+# An unfinished document whose page count has not grown for this long is
+# treated as left behind by a crashed session and ingested again.
+STALE_INGEST_SECONDS = 120
+
+
+def file_sha256(path: str, block_size: int = UPLOAD_BLOCK_SIZE) -> str:
+    """
+    Hash a file in blocks without reading it into memory.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class DocumentStore:
+    """
+    Small wrapper around a SQLite database file.
+    A connection is opened per call so the store can be shared across Streamlit threads.
+    The database runs in WAL mode, so readers never wait on a writer, and writes are
+    committed in small batches, so concurrent ingests only wait briefly for each other.
+    """
+
+    def __init__(self, db_path: str = DOC_STORE_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            # WAL is a persistent property of the database file
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def ingest_pdf(self, pdf_path: str) -> int:
+        """
+        Parse a PDF page by page into the store, unless the same file is already there.
+        If another session is ingesting the same file, wait for it to finish.
+
+        Returns:
+            The document id.
+
+        Raises:
+            sqlite3.OperationalError: If the database stays locked longer than BUSY_TIMEOUT.
+        """
+        sha = file_sha256(pdf_path)
+        while True:
+            existing = self.find_document(sha)
+            if existing is None:
+                try:
+                    return self._insert_pdf(pdf_path, sha)
+                except sqlite3.IntegrityError:
+                    # Another session started on the same file meanwhile
+                    continue
+            if existing["complete"]:
+                return existing["id"]
+            self._wait_for_document(existing["id"])
+
+    def _wait_for_document(self, doc_id: int, poll: float = 0.5):
+        """
+        Wait until a document being ingested elsewhere is complete or gone.
+        A document that stops making progress is deleted so it can be ingested again.
+        """
+        last_pages, last_progress = -1, time.monotonic()
+        while True:
+            with closing(self._connect()) as conn:
+                row = conn.execute(
+                    "SELECT complete, (SELECT COUNT(*) FROM pages WHERE doc_id = ?) AS n "
+                    "FROM documents WHERE id = ?",
+                    (doc_id, doc_id)
+                ).fetchone()
+            if row is None or row["complete"]:
+                return
+            if row["n"] != last_pages:
+                last_pages, last_progress = row["n"], time.monotonic()
+            elif time.monotonic() - last_progress > STALE_INGEST_SECONDS:
+                with closing(self._connect()) as conn, conn:
+                    conn.execute("DELETE FROM documents WHERE id = ? AND complete = 0", (doc_id,))
+                return
+            time.sleep(poll)
+
+    def _insert_pdf(self, pdf_path: str, sha: str) -> int:
+        with closing(self._connect()) as conn:
+            with conn:
+                doc_id = conn.execute(
+                    "INSERT INTO documents (sha256, path, n_pages) VALUES (?, ?, 0)",
+                    (sha, str(pdf_path))
+                ).lastrowid
+
+            rows = []
+            char_start = 0
+            n_pages = 0
+            try:
+                for page_no, text in enumerate(iter_pages(str(pdf_path))):
+                    rows.append((doc_id, page_no, char_start, text))
+                    char_start += len(text) + 1
+                    n_pages += 1
+                    # Commit every few pages; the PDF is parsed outside the write lock.
+                    if len(rows) >= WRITE_BATCH_PAGES:
+                        self._insert_pages(conn, rows)
+                        rows = []
+                self._insert_pages(conn, rows)
+            except BaseException:
+                # Unreadable PDF (or interrupted ingest): drop the unfinished document so
+                # later ingests of the file fail fast instead of waiting for it to go stale.
+                with conn:
+                    conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+                raise
+
+            with conn:
+                conn.execute(
+                    "UPDATE documents SET n_pages = ?, complete = 1 WHERE id = ?", (n_pages, doc_id)
+                )
+        return doc_id
+
+    @staticmethod
+    def _insert_pages(conn: sqlite3.Connection, rows: List[tuple]):
+        with conn:
+            conn.executemany(
+                "INSERT INTO pages (doc_id, page_no, char_start, text) VALUES (?, ?, ?, ?)", rows
+            )
+
+    def get_document(self, doc_id: int) -> Optional[Dict]:
+        """
+        Look up a document by id.
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM documents WHERE id = ?", (doc_id,)).fetchone()
+        return dict(row) if row else None
+
+    def find_document(self, sha256: str) -> Optional[Dict]:
+        """
+        Look up a document by the SHA-256 of its file.
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM documents WHERE sha256 = ?", (sha256,)).fetchone()
+        return dict(row) if row else None
+
+    def iter_pages(self, doc_id: int) -> Iterator[str]:
+        """
+        Yield stored page texts in order, one row at a time.
+        """
+        with closing(self._connect()) as conn:
+            for row in conn.execute(
+                "SELECT text FROM pages WHERE doc_id = ? ORDER BY page_no", (doc_id,)
+            ):
+                yield row["text"]
+
+    def get_text(self, doc_id: int) -> str:
+        """
+        Full document text, equivalent to pdf_loader.extract_text.
+        """
+        return "\n".join(self.iter_pages(doc_id)).strip()
+
+    def get_sections(self, doc_id: int) -> List[Dict]:
+        """
+        Sections of the document, split on first use and stored for later calls.
+        Offsets index into the pages joined by "\\n".
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT heading, text, char_start, char_end FROM sections WHERE doc_id = ? ORDER BY idx",
+                (doc_id,)
+            ).fetchall()
+        if rows:
+            return [
+                {"heading": r["heading"], "text": r["text"], "start": r["char_start"], "end": r["char_end"]}
+                for r in rows
+            ]
+
+        sections = split_into_sections("\n".join(self.iter_pages(doc_id)))
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO sections (doc_id, idx, heading, char_start, char_end, text) VALUES (?, ?, ?, ?, ?, ?)",
+                [(doc_id, i, s["heading"], s["start"], s["end"], s["text"]) for i, s in enumerate(sections)]
+            )
+        return sections
+
+    def _has_chunks(self, doc_id: int, strategy: str) -> bool:
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT 1 FROM chunk_sets WHERE doc_id = ? AND strategy = ?", (doc_id, strategy)
+            ).fetchone() is not None
+
+    def _build_chunks(self, doc_id: int, strategy: str):
+        # Chunking is deterministic, so concurrent or resumed builds just rewrite the
+        # same rows (INSERT OR IGNORE); chunk_sets marks the set as complete.
+        # Pages are streamed on their own connection; under WAL that read does not block the writes.
+        with closing(self._connect()) as conn:
+            rows = []
+            spans = iter_chunk_spans(self.iter_pages(doc_id), strategy=strategy)
+            for idx, (start, end, text) in enumerate(spans):
+                sha = hashlib.sha256(text.encode("utf-8")).hexdigest()
+                rows.append((doc_id, strategy, idx, sha, start, end, text))
+                if len(rows) >= WRITE_BATCH_CHUNKS:
+                    self._insert_chunks(conn, rows)
+                    rows = []
+            self._insert_chunks(conn, rows)
+
+            with conn:
+                conn.execute(
+                    "INSERT OR IGNORE INTO chunk_sets (doc_id, strategy) VALUES (?, ?)", (doc_id, strategy)
+                )
+
+    @staticmethod
+    def _insert_chunks(conn: sqlite3.Connection, rows: List[tuple]):
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO chunks VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def iter_chunks(self, doc_id: int, strategy: str = CHUNK_STRATEGY) -> Iterator[Dict]:
+        """
+        Yield the document's chunks for a chunking strategy, splitting the stored
+        pages on first use (never the PDF itself).
+
+        Yields:
+            {"id", "doc_id", "doc_sha", "strategy", "idx", "sha256", "start", "end", "text"} dicts.
+        """
+        if not self._has_chunks(doc_id, strategy):
+            self._build_chunks(doc_id, strategy)
+
+        with closing(self._connect()) as conn:
+            # Chunk ids carry the file hash so they stay unique in a long-lived vectorstore.
+            doc_sha = conn.execute("SELECT sha256 FROM documents WHERE id = ?", (doc_id,)).fetchone()["sha256"]
+            for row in conn.execute(
+                "SELECT idx, sha256, char_start, char_end, text FROM chunks "
+                "WHERE doc_id = ? AND strategy = ? ORDER BY idx",
+                (doc_id, strategy)
+            ):
+                yield {
+                    "id": f"{doc_sha[:16]}-{strategy}-{row['idx']}",
+                    "doc_id": doc_id,
+                    "doc_sha": doc_sha,
+                    "strategy": strategy,
+                    "idx": row["idx"],
+                    "sha256": row["sha256"],
+                    "start": row["char_start"],
+                    "end": row["char_end"],
+                    "text": row["text"],
+                }
+
+
+def chunk_filter(doc_sha: str, strategy: str) -> Dict:
+    """
+    Chroma metadata filter matching one document's chunks for one chunking strategy.
+    The shared collection holds every document and strategy ever indexed, so
+    retrieval must be scoped with this to avoid near-duplicate or foreign context.
+    """
+    return {"$and": [{"doc_sha": doc_sha}, {"strategy": strategy}]}
+
+
+@lru_cache(maxsize=None)
+def get_doc_store(db_path: str = str(DOC_STORE_PATH)) -> DocumentStore:
+    """
+    Shared store per database file.
+    """
+    return DocumentStore(db_path)
@@ -0,0 +1,243 @@
+"""
+utils/llm_router.py
+
+Routes LLM requests across several backends instead of a single hard-coded ChatGroq:
+- Groq models of different sizes (via langchain_groq)
+- Any OpenAI-compatible server, e.g. a local llama.cpp or Ollama instance
+
+Each backend declares which tasks it prefers ("summarize", "answer"), its own
+concurrency and requests-per-minute limits. After a retryable error (transport,
+timeout, 429, 5xx) a backend is skipped for a cooldown period so the next one
+takes over; other errors are raised to the caller.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import requests
+
+from utils.config import (
+    GROQ_API_KEY, GROQ_MODEL, GROQ_SUMMARY_MODEL,
+    LOCAL_LLM_URL, LOCAL_LLM_MODEL, LLM_BACKENDS
+)
+
+
+class Backend:
+    """
+    One model endpoint with its own concurrency and rate limits.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        provider: str,
+        model: str,
+        tasks: Optional[List[str]] = None,
+        base_url: str = "",
+        api_key: str = "",
+        max_concurrency: int = 4,
+        requests_per_minute: float = 0,
+        timeout: float = 60,
+        cooldown: float = 30
+    ):
+        if provider not in ("groq", "openai"):
+            raise ValueError(f"Unknown LLM provider: {provider}")
+        self.name = name
+        self.provider = provider
+        self.model = model
+        self.tasks = tasks or ["answer", "summarize"]
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self.cooldown = cooldown
+
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._rate_lock = threading.Lock()
+        self._next_request = 0.0
+        self._down_until = 0.0
+        self._client = None
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def mark_failed(self):
+        self._down_until = time.monotonic() + self.cooldown
+
+    def _wait_for_rate_limit(self):
+        if not self._interval:
+            return
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_request - now
+            self._next_request = max(now, self._next_request) + self._interval
+        if wait > 0:
+            time.sleep(wait)
+
+    def invoke(self, prompt: str, temperature: Optional[float] = None) -> str:
+        """
+        Send one prompt to this backend and return the reply text.
+        """
+        with self._slots:
+            self._wait_for_rate_limit()
+            if self.provider == "groq":
+                return self._invoke_groq(prompt, temperature)
+            return self._invoke_openai(prompt, temperature)
+
+    def _invoke_groq(self, prompt: str, temperature: Optional[float]) -> str:
+        if self._client is None:
+            from langchain_groq import ChatGroq
+            # Retries are left to the router, which fails over to the next backend instead.
+            self._client = ChatGroq(
+                groq_api_key=self.api_key or GROQ_API_KEY,
+                model_name=self.model,
+                max_retries=0,
+                timeout=self.timeout
+            )
+        kwargs = {} if temperature is None else {"temperature": temperature}
+        return self._client.invoke(prompt, **kwargs).content
+
+    def _invoke_openai(self, prompt: str, temperature: Optional[float]) -> str:
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        if temperature is not None:
+            payload["temperature"] = temperature
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+
+        r = requests.post(
+            f"{self.base_url}/chat/completions",
+            json=payload,
+            headers=headers,
+            timeout=self.timeout
+        )
+        r.raise_for_status()
+        return r.json()["choices"][0]["message"]["content"]
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Whether another backend might succeed where this one failed:
+    transport errors, timeouts, rate limits (429) and server errors (5xx).
+    Other 4xx errors (bad request, context length, auth) would fail everywhere.
+    """
+    if isinstance(error, (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError)):
+        return True
+
+    # groq SDK errors carry status_code; requests.HTTPError carries a response
+    status = getattr(error, "status_code", None)
+    if status is None and getattr(error, "response", None) is not None:
+        status = getattr(error.response, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+
+    # groq SDK connection failures and timeouts have no status code
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+class LLMRouter:
+    """
+    Picks a backend per task and fails over to the next one on retryable errors.
+    """
+
+    def __init__(self, backends: List[Backend]):
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend.")
+        self.backends = backends
+
+    def _candidates(self, task: str) -> List[Backend]:
+        # Backends preferring this task first (in configured order), then the rest as fallbacks;
+        # backends cooling down after an error go last rather than being dropped.
+        preferred = [b for b in self.backends if task in b.tasks]
+        ordered = preferred + [b for b in self.backends if task not in b.tasks]
+        return [b for b in ordered if b.available] + [b for b in ordered if not b.available]
+
+    def invoke(self, prompt: str, task: str = "answer", temperature: Optional[float] = None) -> str:
+        """
+        Run a prompt on the best available backend for task.
+
+        Args:
+            prompt: Prompt text.
+            task: "answer" or "summarize"; used to pick the preferred backends.
+            temperature: Optional sampling temperature (backend default if None).
+
+        Returns:
+            The reply text.
+
+        Raises:
+            RuntimeError: If every backend failed with a retryable error.
+            Exception: Non-retryable errors (see is_retryable) are raised as-is.
+        """
+        errors = []
+        for backend in self._candidates(task):
+            try:
+                return backend.invoke(prompt, temperature=temperature)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                backend.mark_failed()
+                errors.append(f"{backend.name}: {e}")
+        raise RuntimeError("All LLM backends failed. " + "; ".join(errors))
+
+    def batch(
+        self,
+        prompts: List[str],
+        task: str = "answer",
+        temperature: Optional[float] = None,
+        max_concurrency: int = 8,
+        return_exceptions: bool = False
+    ) -> List:
+        """
+        Run several prompts concurrently, preserving input order.
+        Per-backend limits still apply on top of max_concurrency.
+        """
+        def run(prompt):
+            try:
+                return self.invoke(prompt, task=task, temperature=temperature)
+            except Exception as e:
+                if return_exceptions:
+                    return e
+                raise
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(prompts)))) as pool:
+            return list(pool.map(run, prompts))
+
+
+def default_backends() -> List[Dict]:
+    """
+    Backend settings from the environment.
+
+    LLM_BACKENDS may hold a JSON list of objects with the Backend arguments, e.g.
+    [{"name": "local", "provider": "openai", "model": "llama3",
+      "base_url": "http://localhost:11434/v1", "tasks": ["summarize"]}]
+    Otherwise a small Groq model handles summaries, GROQ_MODEL handles answers,
+    and LOCAL_LLM_URL (if set) is added as the last fallback.
+    """
+    if LLM_BACKENDS:
+        return json.loads(LLM_BACKENDS)
+
+    backends = [
+        {"name": "groq-summary", "provider": "groq", "model": GROQ_SUMMARY_MODEL,
+         "tasks": ["summarize"], "requests_per_minute": 30},
+        {"name": "groq-answer", "provider": "groq", "model": GROQ_MODEL,
+         "tasks": ["answer"], "requests_per_minute": 30},
+    ]
+    if LOCAL_LLM_URL:
+        backends.append({"name": "local", "provider": "openai", "model": LOCAL_LLM_MODEL,
+                         "base_url": LOCAL_LLM_URL, "tasks": ["answer", "summarize"], "max_concurrency": 1})
+    return backends
+
+
+@lru_cache(maxsize=None)
+def get_router() -> LLMRouter:
+    """
+    Shared router, so concurrency and rate limits apply across all callers in the process.
+    """
+    return LLMRouter([Backend(**cfg) for cfg in default_backends()])
+
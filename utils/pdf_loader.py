@@ -6,24 +6,30 @@ Extracts text from PDFs and splits them into logical sections.
 
 import fitz  # PyMuPDF
 import re
-from typing import List, Dict
+from typing import List, Dict, Iterator
+
+
+def iter_pages(pdf_path: str) -> Iterator[str]:
+    """
+    Yield the text of each page in turn, so only one page is held in memory.
+    """
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            yield page.get_text("text")
 
 
 def extract_text(pdf_path: str) -> str:
     """
     Extract raw text from a PDF file using PyMuPDF.
     """
-    doc = fitz.open(pdf_path)
-    text = ""
-    for page in doc:
-        text += page.get_text("text") + "\n"
-    return text.strip()
+    return "\n".join(iter_pages(pdf_path)).strip()
 
 
-def split_into_sections(text: str) -> List[Dict[str, str]]:
+def split_into_sections(text: str) -> List[Dict]:
     """
     Naively split text into sections by headings.
-    Returns a list of dicts with 'heading' and 'text'.
+    Returns a list of dicts with 'heading', 'text' and the
+    'start'/'end' character offsets of the text within the input.
     """
     # Regex for headings (lines in ALL CAPS or starting with numbers)
     pattern = r"(?m)^(?:[A-Z][A-Z\s]{2,}|[0-9]+\.\s+.*)$"
@@ -34,7 +40,14 @@ def split_into_sections(text: str) -> List[Dict[str, str]]:
         heading = match.group().strip()
         start = match.end()
         end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
-        body = text[start:end].strip()
+        raw_body = text[start:end]
+        body = raw_body.strip()
         if heading and body:
-            sections.append({"heading": heading, "text": body})
+            body_start = start + len(raw_body) - len(raw_body.lstrip())
+            sections.append({
+                "heading": heading,
+                "text": body,
+                "start": body_start,
+                "end": body_start + len(body)
+            })
     return sections
@@ -0,0 +1,167 @@
+"""
+utils/section_analysis.py
+
+Document-wide analysis of split sections for the booklet visuals:
+- Counts term frequencies per section, with stopword filtering, and ranks each
+  section's terms against the whole document so charts show what is specific to it
+- Extracts methodology steps and numeric "label: value" results with one regex pass each
+
+The results are plain dicts that utils/visualization.render_section_visual consumes.
+"""
+
+import heapq
+import math
+import re
+import string
+from collections import Counter
+from typing import Dict, List, Tuple
+
+STOPWORDS = frozenset("""
+a about above after again against all also although am an and any are as at be
+because been before being below between both but by can could did do does doing
+done down during each either et etc few for from further had has have having he
+her here hers him his how however i if in into is it its itself just may me might
+more most much must my no nor not of off on once one only or other our ours out
+over own per same shall she should so some such than that the their them then
+there these they this those through thus to too two under until up upon us use
+used using very via was we were what when where whether which while who whom why
+will with within without would yet you your
+fig figure table section paper et al eq equation
+""".split())
+
+# Digits and ASCII punctuation (hyphens aside) become spaces before splitting on whitespace.
+# A bytes table translates the UTF-8 text in one C pass without touching multi-byte
+# characters, so the cleaned text keeps the same character offsets.
+_NON_WORD_CHARS = (string.punctuation.replace("-", "") + string.digits).encode("ascii")
+_NON_WORD = bytes.maketrans(_NON_WORD_CHARS, b" " * len(_NON_WORD_CHARS))
+# Patterns start with a literal newline so the regex engine can jump between lines
+# instead of retrying at every character; the lookahead makes the label match atomic.
+# A step is a bullet or a short list number ("1." / "2)") followed by whitespace and text,
+# so years, table cells and decimals at the start of a line are not picked up.
+_STEP_RE = re.compile(r"\n[ \t]*(?:[-•]|\d{1,2}[.)])[ \t]+([^\n]+)")
+_NUMERIC_RE = re.compile(r"\n(?=([^:\n]+))\1:[ \t]*([-+]?(?:\d+\.?\d*|\.\d+))[ \t]*%?[ \t]*(?=\n)")
+
+
+def _clean(text: str) -> str:
+    return text.encode("utf-8").translate(_NON_WORD).decode("utf-8")
+
+
+def _non_terms(words) -> set:
+    return {w for w in words if len(w) < 3 or w in STOPWORDS or not w[0].isalpha()}
+
+
+def term_counts(text: str) -> Counter:
+    """
+    Count lowercase words in text, dropping stopwords and very short tokens.
+    """
+    counts = Counter(_clean(text).lower().split())
+    # Filter the (much smaller) vocabulary rather than every token.
+    for word in _non_terms(counts):
+        counts.pop(word)
+    return counts
+
+
+def section_term_counts(texts: List[str]) -> Tuple[List[Counter], Counter]:
+    """
+    Count terms per section and how many sections each term appears in.
+    All sections are cleaned in one pass and the vocabulary is filtered once
+    per document, so many short sections cost little more than one long one.
+
+    Args:
+        texts: One text per section.
+
+    Returns:
+        (per_section, section_frequency) Counters.
+    """
+    cleaned = _clean("".join(texts))
+    per_section = []
+    start = 0
+    for text in texts:
+        per_section.append(Counter(cleaned[start:start + len(text)].lower().split()))
+        start += len(text)
+
+    section_frequency = Counter()
+    for counts in per_section:
+        section_frequency.update(counts.keys())
+    dropped = _non_terms(section_frequency)
+    for counts in [section_frequency] + per_section:
+        # dict.pop rather than Counter's pure-Python __delitem__
+        for word in dropped.intersection(counts):
+            counts.pop(word)
+    return per_section, section_frequency
+
+
+def idf_weights(section_frequency: Counter, n_sections: int) -> Dict[str, float]:
+    """
+    Smoothed inverse section frequency of every term, computed once per document.
+    """
+    return {
+        term: math.log((1 + n_sections) / (1 + df)) + 1
+        for term, df in section_frequency.items()
+    }
+
+
+def distinctive_terms(
+    counts: Counter,
+    idf: Dict[str, float],
+    k: int = 5
+) -> List[Tuple[str, int]]:
+    """
+    Pick the k terms most specific to one section, scoring count x idf (see idf_weights)
+    so words used all over the document rank below the section's own vocabulary.
+    Returns (term, count) pairs so charts still show plain frequencies.
+    """
+    return heapq.nlargest(k, counts.items(), key=lambda item: item[1] * idf[item[0]])
+
+
+MIN_STEP_CHARS = 10
+
+
+def extract_steps(text: str) -> List[str]:
+    """
+    Return bullet or numbered lines that look like methodology steps.
+    Only lines with at least two words of real text (starting with a letter) are kept.
+    """
+    steps = []
+    for line in _STEP_RE.findall("\n" + text):
+        step = line.strip()
+        if len(step) >= MIN_STEP_CHARS and step[0].isalpha() and len(step.split()) >= 2:
+            steps.append(step)
+    return steps
+
+
+def extract_numeric_results(text: str) -> List[Tuple[str, float]]:
+    """
+    Return (label, value) pairs for lines of the form "Label: 12.5" or "Label: 80%".
+    """
+    results = []
+    for label, value in _NUMERIC_RE.findall("\n" + text + "\n"):
+        label = label.strip()
+        if label:
+            results.append((label, float(value)))
+    return results
+
+
+def analyze_sections(sections: List[Dict[str, str]], top_k: int = 5) -> List[Dict]:
+    """
+    Analyze all sections of a document at once.
+
+    Args:
+        sections: List of {"heading":..., "text":...} dicts (see pdf_loader.split_into_sections).
+        top_k: Number of distinctive terms to keep per section.
+
+    Returns:
+        One dict per section with "top_terms", "steps" and "numeric" keys.
+    """
+    texts = [sec["text"] for sec in sections]
+    per_section, section_frequency = section_term_counts(texts)
+    idf = idf_weights(section_frequency, len(texts))
+
+    return [
+        {
+            "top_terms": distinctive_terms(counts, idf, k=top_k),
+            "steps": extract_steps(text),
+            "numeric": extract_numeric_results(text),
+        }
+        for counts, text in zip(per_section, texts)
+    ]
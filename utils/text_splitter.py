@@ -1,13 +1,26 @@
 """
 utils/text_splitter.py
 
-Chunk text using LangChain's built-in text splitters.
-Default: RecursiveCharacterTextSplitter for general text,
-and TokenTextSplitter for token-accurate splitting.
+Chunk text for embedding and summarization.
+- "recursive": LangChain's RecursiveCharacterTextSplitter for general text
+- "tokens": token-accurate splitting with the tokenizer of the target model,
+  so chunks never exceed the model's max sequence length
 """
 
-from typing import List, Optional
-from langchain.text_splitter import RecursiveCharacterTextSplitter, TokenTextSplitter
+import logging
+from functools import lru_cache
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from utils.config import (
+    CHUNK_STRATEGY, CHUNK_TOKENS, CHUNK_TOKEN_OVERLAP, EMBEDDING_MODEL,
+    GROQ_MODEL, GROQ_SUMMARY_MODEL, LOCAL_LLM_MODEL
+)
+
+logger = logging.getLogger(__name__)
+
+# Model names that only exist behind an LLM API; these get the cl100k_base approximation.
+LLM_MODEL_NAMES = frozenset({GROQ_MODEL, GROQ_SUMMARY_MODEL, LOCAL_LLM_MODEL})
 
 
 def split_text_recursive(
@@ -40,28 +53,274 @@ def split_text_recursive(
     return splitter.split_text(text)
 
 
+def iter_chunk_spans(
+    pages: Iterable[str],
+    strategy: str = CHUNK_STRATEGY,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None
+) -> Iterator[Tuple[int, int, str]]:
+    """
+    Lazily split a stream of page texts into overlapping chunks.
+    Only the current page plus the unfinished tail of the previous one
+    is held in memory, so chunks may still span page boundaries.
+
+    Args:
+        pages: Iterable of page strings (e.g. from pdf_loader.iter_pages).
+        strategy: "recursive" or "tokens" (see split_text).
+        chunk_size: Target chunk size (characters or tokens, depending on strategy).
+        chunk_overlap: Overlap between chunks (same unit as chunk_size).
+
+    Yields:
+        (start, end, text) per chunk, in document order. Offsets index into
+        the pages joined with "\n".
+    """
+    carry, carry_start = "", 0
+    last = None
+    page_start = 0
+    for page in pages:
+        if carry:
+            buffer, offset = carry + "\n" + page, carry_start
+        else:
+            buffer, offset = page, page_start
+        page_start += len(page) + 1
+
+        spans = split_spans(buffer, strategy=strategy, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        if not spans:
+            carry, last = "", None
+            continue
+        # The last chunk may continue on the next page; re-split it with the next page.
+        last_start, last_end = spans.pop()
+        carry, carry_start = buffer[last_start:], offset + last_start
+        last = (offset + last_start, offset + last_end, buffer[last_start:last_end])
+        for start, end in spans:
+            yield offset + start, offset + end, buffer[start:end]
+    if last:
+        yield last
+
+
+def iter_chunks(
+    pages: Iterable[str],
+    strategy: str = CHUNK_STRATEGY,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None
+) -> Iterator[str]:
+    """
+    Like iter_chunk_spans, but yields only the chunk strings.
+    """
+    for _, _, text in iter_chunk_spans(pages, strategy, chunk_size, chunk_overlap):
+        yield text
+
+
+def batch_chunks(
+    chunks: Iterable,
+    max_bytes: int,
+    key: Optional[Callable[[Any], str]] = None,
+    max_items: Optional[int] = None,
+    item_overhead: int = 0
+) -> Iterator[List]:
+    """
+    Group chunks into lists whose combined size stays under max_bytes.
+    Each chunk counts as its UTF-8 size plus item_overhead bytes (e.g. the
+    embedding vector it will produce); max_items caps the chunks per batch.
+    A single chunk larger than max_bytes is emitted as its own batch.
+    key extracts the text from non-string chunks (e.g. chunk records from utils.doc_store).
+    """
+    batch: List = []
+    size = 0
+    for chunk in chunks:
+        chunk_size = len((key(chunk) if key else chunk).encode("utf-8")) + item_overhead
+        if batch and (size + chunk_size > max_bytes or len(batch) == max_items):
+            yield batch
+            batch, size = [], 0
+        batch.append(chunk)
+        size += chunk_size
+    if batch:
+        yield batch
+
+
+class _Tokenizer:
+    """
+    Thin wrapper exposing character offsets for either a HuggingFace fast
+    tokenizer or a tiktoken encoding.
+    """
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._hf = None
+        self._tiktoken = None
+
+        if model_name in LLM_MODEL_NAMES:
+            # Served LLM names (e.g. llama3-70b-8192 on Groq) are not HuggingFace ids.
+            # Llama 3's BPE vocabulary extends cl100k_base, so it is a close token count.
+            import tiktoken
+            logger.warning("No HuggingFace tokenizer for %s; approximating with tiktoken cl100k_base.", model_name)
+            self._tiktoken = tiktoken.get_encoding("cl100k_base")
+            return
+
+        # Chunk limits are tuned to this exact tokenizer (e.g. all-MiniLM's 256 word pieces),
+        # so an approximation would silently overshoot; fail loudly instead.
+        try:
+            from transformers import AutoTokenizer
+            self._hf = AutoTokenizer.from_pretrained(model_name)
+        except Exception as e:
+            raise RuntimeError(
+                f"Could not load the tokenizer for {model_name}. "
+                "Install `transformers` and check the model id / HuggingFace access, "
+                "or set CHUNK_STRATEGY=recursive."
+            ) from e
+
+    def offsets(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Encode text once and return the (start, end) character span of every token.
+        """
+        if self._hf is not None:
+            encoding = self._hf(
+                text,
+                add_special_tokens=False,
+                return_offsets_mapping=True,
+                verbose=False
+            )
+            return encoding["offset_mapping"]
+
+        _, starts = self._tiktoken.decode_with_offsets(self._tiktoken.encode(text))
+        ends = starts[1:] + [len(text)]
+        return list(zip(starts, ends))
+
+    def count(self, text: str) -> int:
+        return len(self.offsets(text))
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(model_name: str = EMBEDDING_MODEL) -> _Tokenizer:
+    """
+    Load the tokenizer for model_name once per process.
+    """
+    return _Tokenizer(model_name)
+
+
+def split_token_spans(
+    text: str,
+    chunk_size: int = CHUNK_TOKENS,
+    chunk_overlap: int = CHUNK_TOKEN_OVERLAP,
+    model_name: str = EMBEDDING_MODEL
+) -> List[Tuple[int, int]]:
+    """
+    Compute (start, end) character spans of token-bounded chunks from one encode pass
+    of text; each chunk is re-counted on its own so it never exceeds chunk_size.
+
+    Args:
+        text: Input text.
+        chunk_size: Maximum chunk size (tokens).
+        chunk_overlap: Overlap between chunks (tokens).
+        model_name: Model whose tokenizer defines the token boundaries.
+
+    Returns:
+        List of character spans into text.
+    """
+    if chunk_overlap >= chunk_size:
+        raise ValueError("chunk_overlap must be smaller than chunk_size.")
+
+    tokenizer = get_tokenizer(model_name)
+    offsets = tokenizer.offsets(text)
+    spans = []
+    start = 0
+    while start < len(offsets):
+        end = min(start + chunk_size, len(offsets))
+        # A chunk cut mid-word (e.g. starting on a "##" piece) can re-tokenize into more
+        # pieces than it was cut from; drop trailing tokens until the text itself fits.
+        while end - start > 1 and tokenizer.count(text[offsets[start][0]:offsets[end - 1][1]]) > chunk_size:
+            end -= 1
+        spans.append((offsets[start][0], offsets[end - 1][1]))
+        if end == len(offsets):
+            break
+        start = max(end - chunk_overlap, start + 1)
+    return spans
+
+
 def split_text_tokens(
     text: str,
-    chunk_size: int = 700,
-    chunk_overlap: int = 100,
-    model_name: str = "gpt-3.5-turbo"
+    chunk_size: int = CHUNK_TOKENS,
+    chunk_overlap: int = CHUNK_TOKEN_OVERLAP,
+    model_name: str = EMBEDDING_MODEL
 ) -> List[str]:
     """
-    Split text by token count using TokenTextSplitter.
+    Split text by token count using the tokenizer of model_name.
     Useful for strict token limits.
 
     Args:
         text: Input text.
-        chunk_size: Target chunk size (tokens).
+        chunk_size: Maximum chunk size (tokens).
         chunk_overlap: Overlap between chunks (tokens).
-        model_name: Model encoding name for tiktoken.
+        model_name: HuggingFace model id, or a configured LLM name (approximated with cl100k_base).
 
     Returns:
         List of chunk strings.
     """
-    splitter = TokenTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        encoding_name=model_name  # LangChain handles tiktoken usage internally
-    )
-    return splitter.split_text(text)
+    return [text[start:end] for start, end in split_token_spans(text, chunk_size, chunk_overlap, model_name)]
+
+
+def split_text(
+    text: str,
+    strategy: str = CHUNK_STRATEGY,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    model_name: str = EMBEDDING_MODEL
+) -> List[str]:
+    """
+    Split text with the selected chunking strategy.
+
+    Args:
+        text: Input text.
+        strategy: "recursive" (characters) or "tokens".
+        chunk_size: Target chunk size; defaults depend on the strategy.
+        chunk_overlap: Overlap between chunks; defaults depend on the strategy.
+        model_name: Tokenizer model for the "tokens" strategy.
+
+    Returns:
+        List of chunk strings.
+    """
+    if strategy == "recursive":
+        return split_text_recursive(
+            text,
+            chunk_size=chunk_size or 700,
+            chunk_overlap=100 if chunk_overlap is None else chunk_overlap
+        )
+
+    elif strategy == "tokens":
+        return split_text_tokens(
+            text,
+            chunk_size=chunk_size or CHUNK_TOKENS,
+            chunk_overlap=CHUNK_TOKEN_OVERLAP if chunk_overlap is None else chunk_overlap,
+            model_name=model_name
+        )
+
+    else:
+        raise ValueError(f"Unknown chunking strategy: {strategy}")
+
+
+def split_spans(
+    text: str,
+    strategy: str = CHUNK_STRATEGY,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    model_name: str = EMBEDDING_MODEL
+) -> List[Tuple[int, int]]:
+    """
+    Same as split_text, but returns (start, end) character spans into text.
+    """
+    if strategy == "tokens":
+        return split_token_spans(
+            text,
+            chunk_size=chunk_size or CHUNK_TOKENS,
+            chunk_overlap=CHUNK_TOKEN_OVERLAP if chunk_overlap is None else chunk_overlap,
+            model_name=model_name
+        )
+
+    spans = []
+    cursor = 0
+    for chunk in split_text(text, strategy=strategy, chunk_size=chunk_size, chunk_overlap=chunk_overlap):
+        # Chunks are substrings of text in order; overlapping ones start after the previous start.
+        start = text.find(chunk, cursor)
+        spans.append((start, start + len(chunk)))
+        cursor = start + 1
+    return spans
@@ -6,7 +6,9 @@ Generates basic flow diagrams and bar charts using Matplotlib.
 
 import matplotlib.pyplot as plt
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
+
+from utils.section_analysis import analyze_sections
 
 OUTPUT_DIR = Path("outputs/diagrams")
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -15,28 +17,47 @@ import matplotlib.pyplot as plt
 from pathlib import Path
 import uuid
 
-def _generate_visual(section_text: str, out_dir: str = "outputs/diagrams") -> str:
+def _generate_visual(section_text: str, out_dir: str = "outputs/diagrams") -> Optional[str]:
+    """
+    Analyze a single section and render its visual.
+    Prefer analyze_sections + render_section_visual when handling a whole document.
     """
-    Placeholder: Generate a simple bar chart showing word frequency in the section.
-    Later, replace with more relevant visualizations.
+    analysis = analyze_sections([{"heading": "", "text": section_text}])[0]
+    return render_section_visual(analysis, out_dir)
+
+
+# Fewer steps is not a process; more would not fit a readable diagram.
+MIN_FLOW_STEPS = 3
+MAX_FLOW_STEPS = 10
+
+
+def render_section_visual(analysis: Dict, out_dir: str = "outputs/diagrams") -> Optional[str]:
+    """
+    Render the most relevant visual for a section from its precomputed analysis
+    (see utils/section_analysis.analyze_sections):
+    a flow diagram for 3-10 methodology steps, a bar chart for numeric results,
+    or otherwise a chart of the section's top terms.
     """
     Path(out_dir).mkdir(parents=True, exist_ok=True)
+    img_path = Path(out_dir) / f"visual_{uuid.uuid4().hex}.png"
+
+    if MIN_FLOW_STEPS <= len(analysis["steps"]) <= MAX_FLOW_STEPS:
+        return flow_diagram(analysis["steps"], out_path=img_path)
 
-    words = section_text.split()
-    freq = {}
-    for w in words:
-        freq[w] = freq.get(w, 0) + 1
+    if 1 <= len(analysis["numeric"]) <= 6:
+        labels, values = zip(*analysis["numeric"])
+        return bar_chart(list(labels), list(values), title="Results", out_path=img_path)
 
-    # Take top 5 frequent words
-    top_items = sorted(freq.items(), key=lambda x: x[1], reverse=True)[:5]
-    labels, values = zip(*top_items) if top_items else ([], [])
+    if not analysis["top_terms"]:
+        return None
+
+    labels, values = zip(*analysis["top_terms"])
 
     plt.figure(figsize=(6, 4))
     plt.bar(labels, values)
-    plt.title("Top Words in Section")
+    plt.title("Top Terms in Section")
     plt.tight_layout()
 
-    img_path = Path(out_dir) / f"visual_{uuid.uuid4().hex}.png"
     plt.savefig(img_path)
     plt.close()
 